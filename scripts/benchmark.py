@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""Benchmark the Python scripts in this folder against synthetic inputs.
+
+Every case generates its own input under a scratch directory, runs the
+script as a subprocess (so interpreter startup is included, as in real
+use) and records wall time, peak RSS and files/sec. With --strace the
+case is run once more under `strace -c` to count syscalls.
+
+  ./benchmark.py                         run all cases, compare to baseline
+  ./benchmark.py --save-baseline         store results as the new baseline
+  ./benchmark.py to-claude --scale 10    one case, ten times bigger input
+
+Exit status is 1 when a case is slower or bigger than its baseline by more
+than --tolerance.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(SCRIPTS_DIR, "benchmark-baseline.json")
+
+SHOW_NAMES = [
+    "Shingeki no Kyojin",
+    "Sousou no Frieren",
+    "Kusuriya no Hitorigoto",
+    "Dungeon Meshi",
+    "Boku no Hero Academia",
+    "Jujutsu Kaisen",
+    "Spy x Family",
+    "Chainsaw Man",
+    "Vinland Saga",
+    "Oshi no Ko",
+]
+RELEASE_FORMATS = [
+    "[SubsPlease] {show} - {ep:02d} (1080p) [{crc}]",
+    "[Erai-raws] {show} - {ep:02d} [1080p][Multiple Subtitle]",
+    "{dotted}.S{season:02d}E{ep:02d}.1080p.WEB-DL.x264-GRP",
+    "[Judas] {show} - Episode {ep} [BD 1080p][HEVC x265 10bit]",
+    "{show}_{ep:02d}",
+]
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
+
+
+def touch(path, size=0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        if size:
+            f.truncate(size)
+
+
+def release_name(rng, show, season, ep):
+    fmt = rng.choice(RELEASE_FORMATS)
+    return fmt.format(
+        show=show,
+        dotted=show.replace(" ", "."),
+        season=season,
+        ep=ep,
+        crc=f"{rng.getrandbits(32):08X}",
+    )
+
+
+# --- generators -------------------------------------------------------------
+
+
+def gen_monorepo(root, scale, rng):
+    """Monorepo-shaped tree: packages with src/test dirs plus heavy excluded dirs."""
+    count = 0
+    for p in range(max(1, int(20 * scale))):
+        pkg = os.path.join(root, "packages", f"pkg_{p:03d}")
+        write(os.path.join(pkg, "package.json"), json.dumps({"name": f"pkg_{p}"}))
+        count += 1
+        for d in range(5):
+            for f in range(10):
+                body = f"export const v{f} = {rng.random()};\n" * 20
+                write(os.path.join(pkg, "src", f"mod_{d}", f"file_{f}.ts"), body)
+                write(os.path.join(pkg, "src", f"mod_{d}", f"file_{f}.test.ts"), body)
+                count += 2
+        for f in range(30):
+            write(os.path.join(pkg, "node_modules", "dep", f"index_{f}.js"), "x\n")
+        write(os.path.join(pkg, ".git", "HEAD"), "ref: refs/heads/main\n")
+    return count
+
+
+def gen_json_set(root, scale, rng, files=8, fmt="json"):
+    """JSON arrays (or NDJSON) of records sorted by id/timestamp.
+
+    Roughly 1 MB per file at scale 1; scale into the thousands for multi-GB
+    sets. Rows are written as they are generated, so memory stays flat.
+    """
+    os.makedirs(root, exist_ok=True)
+    paths = []
+    records = max(1, int(5000 * scale))
+    for i in range(files):
+        ts = 1_600_000_000 + i
+        path = os.path.join(root, f"part_{i:03d}.{fmt}")
+        with open(path, "w", encoding="utf-8") as f:
+            if fmt != "ndjson":
+                f.write("[")
+            for r in range(records):
+                ts += rng.randint(1, 60)
+                row = json.dumps(
+                    {
+                        "id": r * files + i,
+                        "timestamp": ts,
+                        "user": f"user_{rng.randint(0, 9999)}",
+                        "payload": {"value": rng.random(), "tags": ["a", "b", "c"]},
+                    }
+                )
+                if fmt == "ndjson":
+                    f.write(row + "\n")
+                else:
+                    f.write((", " if r else "") + row)
+            if fmt != "ndjson":
+                f.write("]")
+        paths.append(path)
+    return paths
+
+
+def gen_bundle(path, scale, rng):
+    """A `// path` bundle like the ones LLMs produce, with mixed comment markers."""
+    sections = max(1, int(500 * scale))
+    markers = [("//", "ts"), ("#", "py"), ("--", "sql")]
+    out = []
+    for i in range(sections):
+        marker, ext = markers[i % len(markers)]
+        out.append(f"{marker} src/dir_{i % 37}/file_{i}.{ext}")
+        out.append("")
+        for line in range(rng.randint(10, 60)):
+            out.append(f"    value_{line} = {rng.random()}")
+        out.append("")
+    write(path, "\n".join(out))
+    return sections
+
+
+def gen_anime_library(root, scale, rng):
+    """Series folders with Season dirs, realistic release names and subtitles."""
+    count = 0
+    for s in range(max(1, int(10 * scale))):
+        show = SHOW_NAMES[s % len(SHOW_NAMES)]
+        if s >= len(SHOW_NAMES):
+            show = f"{show} {s // len(SHOW_NAMES) + 1}"
+        series = os.path.join(root, f"{show} ({2010 + s % 15}) [1080p]")
+        for season in range(1, rng.randint(2, 4)):
+            for ep in range(1, 25):
+                stem = release_name(rng, show, season, ep)
+                season_dir = os.path.join(series, f"Season {season:02d}")
+                touch(os.path.join(season_dir, stem + ".mkv"), 4096)
+                touch(os.path.join(season_dir, stem + ".en.ass"))
+                count += 2
+    return count
+
+
+def gen_sequence_folder(root, scale, rng):
+    """One flat folder of episodes with subtitles, as fed to rename_sequence.py."""
+    count = 0
+    for ep in range(1, max(2, int(2000 * scale))):
+        stem = release_name(rng, "Detective Conan", 1, ep)
+        touch(os.path.join(root, stem + ".mkv"), 1024)
+        touch(os.path.join(root, stem + ".en.srt"))
+        count += 2
+    return count
+
+
+# --- cases --------------------------------------------------------------------
+# Each setup(workdir, scale, rng) builds a fresh input and returns
+# (argv relative to SCRIPTS_DIR, number of files the run processes).
+
+
+def setup_to_claude(work, scale, rng):
+    src = os.path.join(work, "repo")
+    files = gen_monorepo(src, scale, rng)
+    return ["to-claude.py", src, "packages/**", "-d", os.path.join(work, "out")], files
+
+
+def setup_merge_json(work, scale, rng):
+    paths = gen_json_set(os.path.join(work, "json"), scale, rng)
+    return ["merge-json.py", os.path.join(work, "merged.json")] + paths, len(paths)
+
+
+def setup_merge_sorted(work, scale, rng):
+    paths = gen_json_set(os.path.join(work, "ndjson"), scale, rng, fmt="ndjson")
+    out = os.path.join(work, "merged.json")
+    return ["merge-json.py", "--merge-sorted", "timestamp", out] + paths, len(paths)
+
+
+def setup_file_split(work, scale, rng):
+    bundle = os.path.join(work, "bundle.txt")
+    sections = gen_bundle(bundle, scale, rng)
+    out = os.path.join(work, "split")
+    os.makedirs(out)
+    return ["file-split.py", out, bundle], sections
+
+
+def setup_rename_jellyfin(work, scale, rng):
+    root = os.path.join(work, "Animes")
+    files = gen_anime_library(root, scale, rng)
+    return ["rename_jellyfin.py", root, "--apply"], files
+
+
+def setup_rename_sequence(work, scale, rng):
+    root = os.path.join(work, "Conan")
+    files = gen_sequence_folder(root, scale, rng)
+    return ["rename_sequence.py", root, "Detective Conan", "1", "--apply"], files
+
+
+CASES = {
+    "to-claude": setup_to_claude,
+    "merge-json": setup_merge_json,
+    "merge-sorted": setup_merge_sorted,
+    "file-split": setup_file_split,
+    "rename-jellyfin": setup_rename_jellyfin,
+    "rename-sequence": setup_rename_sequence,
+}
+
+
+# --- measurement ----------------------------------------------------------------
+
+
+def run_once(argv, cwd):
+    """Run argv, returning (seconds, peak RSS in KB, exit status)."""
+    # stderr goes to a file rather than a pipe: nothing reads a pipe while
+    # we sit in wait4, so a chatty child would block on a full buffer
+    with tempfile.TemporaryFile() as err_file:
+        start = time.perf_counter()
+        proc = subprocess.Popen(argv, cwd=cwd, stdout=subprocess.DEVNULL, stderr=err_file)
+        _, status, usage = os.wait4(proc.pid, 0)
+        elapsed = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if proc.returncode != 0:
+            err_file.seek(0)
+            err = err_file.read().decode(errors="replace")
+            raise RuntimeError(f"{' '.join(argv)} exited with {proc.returncode}\n{err}")
+    return elapsed, usage.ru_maxrss, proc.returncode
+
+
+def count_syscalls(argv, cwd):
+    """Total syscalls made by argv under `strace -c`, or None without strace."""
+    strace = shutil.which("strace")
+    if not strace:
+        return None
+    fd, out = tempfile.mkstemp(suffix=".strace")
+    os.close(fd)
+    try:
+        subprocess.run(
+            [strace, "-f", "-c", "-o", out] + argv,
+            cwd=cwd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        total = 0
+        with open(out) as f:
+            for line in f:
+                parts = line.split()
+                # Per-syscall rows: % time, seconds, usecs/call, calls, [errors,] name
+                if len(parts) >= 5 and parts[-1] != "total" and parts[3].isdigit():
+                    total += int(parts[3])
+        return total
+    finally:
+        os.unlink(out)
+
+
+def run_case(name, scale, repeat, strace, keep, seed):
+    """Run one case repeat times on fresh inputs; keep the fastest time and peak RSS."""
+    best = None
+    peak_rss = 0
+    syscalls = None
+    items = 0
+    for i in range(repeat):
+        work = tempfile.mkdtemp(prefix=f"bench-{name}-")
+        try:
+            args, items = CASES[name](work, scale, random.Random(seed))
+            argv = [sys.executable, os.path.join(SCRIPTS_DIR, args[0])] + args[1:]
+            seconds, rss, _ = run_once(argv, work)
+            best = seconds if best is None else min(best, seconds)
+            peak_rss = max(peak_rss, rss)
+            if strace and i == 0:
+                # Fresh input again: the timed run may have consumed it (renames)
+                shutil.rmtree(work)
+                os.makedirs(work)
+                args, _ = CASES[name](work, scale, random.Random(seed))
+                argv = [sys.executable, os.path.join(SCRIPTS_DIR, args[0])] + args[1:]
+                syscalls = count_syscalls(argv, work)
+        finally:
+            if keep:
+                print(f"  kept {work}")
+            else:
+                shutil.rmtree(work, ignore_errors=True)
+    return {
+        "seconds": round(best, 4),
+        "max_rss_kb": peak_rss,
+        "files": items,
+        "files_per_sec": round(items / best, 1) if best else None,
+        "syscalls": syscalls,
+    }
+
+
+def compare(name, result, baseline, tolerance):
+    """Return a list of regression messages for result against baseline."""
+    problems = []
+    for key, label in (("seconds", "time"), ("max_rss_kb", "peak RSS"), ("syscalls", "syscalls")):
+        old = baseline.get(key)
+        new = result.get(key)
+        if old and new and new > old * (1 + tolerance):
+            problems.append(f"{name}: {label} {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scripts in this folder")
+    parser.add_argument("cases", nargs="*", help=f"cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument("--scale", type=float, default=1.0, help="input size multiplier")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, fastest is kept")
+    parser.add_argument("--strace", action="store_true", help="also count syscalls with strace -c")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the generators")
+    parser.add_argument("--keep", action="store_true", help="keep generated inputs")
+    args = parser.parse_args()
+
+    cases = args.cases or list(CASES)
+    for name in cases:
+        if name not in CASES:
+            parser.error(f"unknown case '{name}'")
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    scale_key = f"scale={args.scale:g}"
+
+    results = {}
+    problems = []
+    print(f"{'case':<18}{'seconds':>10}{'RSS MB':>10}{'files/s':>12}{'syscalls':>12}")
+    for name in cases:
+        result = run_case(name, args.scale, args.repeat, args.strace, args.keep, args.seed)
+        results[name] = result
+        print(
+            f"{name:<18}{result['seconds']:>10.3f}{result['max_rss_kb'] / 1024:>10.1f}"
+            f"{result['files_per_sec'] or 0:>12.0f}{result['syscalls'] or '-':>12}"
+        )
+        base = baselines.get(scale_key, {}).get(name)
+        if base:
+            problems.extend(compare(name, result, base, args.tolerance))
+
+    if args.save_baseline:
+        baselines.setdefault(scale_key, {}).update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if problems:
+        print("\nRegressions:")
+        for p in problems:
+            print(f"  {p}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
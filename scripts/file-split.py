@@ -4,57 +4,173 @@ import sys
 import re
 from pathlib import Path
 
+import fswalk
+import runstats
+
+# Remembers directories already created during this run
+_fs = fswalk.FsCache()
+
 def create_directories(file_path):
     """Create all necessary directories for the given file path."""
     directory = os.path.dirname(file_path)
     if directory:
-        os.makedirs(directory, exist_ok=True)
+        _fs.makedirs(directory)
+
+# One alternation covering every header form, checked once per candidate line:
+#   // path/to/file.ext     -- path/to/file.ext     # path/to/file.ext
+#   /* path/to/file.ext */  <!-- path/to/file.ext -->
+#   ```lang path/to/file.ext   (or ~~~; the block is the file, taken literally)
+# A bare ```lang fence whose first line is a comment header just wraps a
+# bundle: its fence lines are dropped and headers inside it still split files.
+HEADER_PATTERN = re.compile(r"""
+    ^(?:
+        (?P<fence>`{3,}|~{3,})\s*(?P<info>[^`]*)
+      | (?://|--|\#)\s*(?P<line>.+\..+)
+      | /\*\s*(?P<block>[\w./\\-]+\.\w+)\s*\*/
+      | <!--\s*(?P<html>[\w./\\-]+\.\w+)\s*-->
+    )$
+""", re.VERBOSE)
+
+# Lines not starting with one of these can't be headers, so skip the regex
+HEADER_START_CHARS = frozenset("/-#<`~")
+
+FENCE_PATH_PATTERN = re.compile(r'^[\w./\\-]*[\w-]\.\w+$')
+
+def fence_path(info):
+    """Pick the file path out of a fence info string like 'python src/x.py',
+    'python:src/x.py' or 'ts title="src/x.ts"'. Returns None for a bare language.
+
+    The first token is normally the language (python3.11, vue2.x), so it only
+    counts as a path when it has a directory part, as in '```src/x.py'.
+    """
+    for i, token in enumerate(re.split(r'[\s:=]+', info)):
+        token = token.strip('"\'')
+        if FENCE_PATH_PATTERN.match(token) and (i > 0 or '/' in token):
+            return token
+    return None
+
+def comment_header(match):
+    """Path of a //, --, #, /* */ or <!-- --> header match."""
+    return match.group('line') or match.group('block') or match.group('html')
+
+def is_fence_close(stripped, fence):
+    """A closing fence uses the same character, at least as many times, and nothing else."""
+    return (
+        len(stripped) >= len(fence)
+        and stripped[0] == fence[0]
+        and stripped == stripped[0] * len(stripped)
+    )
 
 def split_file(input_file, base_path):
-    """Split the input file into multiple files based on path comments."""
+    """Split the input file into multiple files based on path headers."""
+    current_file_path = None
+    current_content = []
+    files_created = 0
+    line_count = 0
+    regex_evaluations = 0
+
+    # Fence naming the current file (content is taken literally until it closes)
+    fence = None
+    # Bare fence wrapping one or more headed files (headers still apply inside)
+    wrapper = None
+    # A bare fence (plus blank lines) waiting to see if a header follows it
+    pending = None
+    pending_fence = None
+
+    def start_file(path):
+        nonlocal current_file_path, current_content, files_created
+        # Save previous file if we have content
+        if current_file_path and current_content:
+            save_file(current_file_path, current_content, base_path)
+            files_created += 1
+        current_file_path = path
+        current_content = []
+
+    def add_line(line):
+        # Add line to current file content (skip empty lines at the beginning)
+        if current_content or line.strip():
+            current_content.append(line)
+
+    # Decode the whole input up front so a bad byte aborts before any file
+    # is written, rather than partway through the output
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with runstats.stats.phase("read"), open(input_file, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
     except FileNotFoundError:
         print(f"Error: File '{input_file}' not found.")
         return False
     except Exception as e:
         print(f"Error reading file: {e}")
         return False
-    
-    # Split content by lines
-    lines = content.split('\n')
-    
-    current_file_path = None
-    current_content = []
-    files_created = 0
-    
-    # Pattern to match file path comments (// path/to/file.ext, -- path/to/file.ext, # path/to/file.ext)
-    path_pattern = re.compile(r'^(?://|--|#)\s*(.+\..+)$')
-    
-    for line in lines:
-        # Check if this line is a file path comment
-        match = path_pattern.match(line.strip())
-        
-        if match:
-            # Save previous file if we have content
-            if current_file_path and current_content:
-                save_file(current_file_path, current_content, base_path)
-                files_created += 1
-            
-            # Start new file
-            current_file_path = match.group(1)
-            current_content = []
-        else:
-            # Add line to current file content (skip empty lines at the beginning)
-            if current_content or line.strip():
-                current_content.append(line)
-    
+
+    with runstats.stats.phase("split"):
+        for line in lines:
+            line = line.rstrip('\n')
+            line_count += 1
+            stripped = line.strip()
+
+            if fence is not None:
+                if is_fence_close(stripped, fence):
+                    # Text after the block is prose, not part of the file
+                    start_file(None)
+                    fence = None
+                else:
+                    current_content.append(line)
+                continue
+
+            match = None
+            if stripped and stripped[0] in HEADER_START_CHARS:
+                regex_evaluations += 1
+                match = HEADER_PATTERN.match(stripped)
+
+            if wrapper is not None:
+                if is_fence_close(stripped, wrapper):
+                    # Text after the block is prose, not part of the file
+                    start_file(None)
+                    wrapper = None
+                elif match and not match.group('fence'):
+                    start_file(comment_header(match))
+                else:
+                    add_line(line)
+                continue
+
+            if pending is not None:
+                if not stripped:
+                    pending.append(line)
+                    continue
+                if match and not match.group('fence'):
+                    # ```lang / header / ... / ```: drop the fence, keep the header
+                    start_file(comment_header(match))
+                    wrapper = pending_fence
+                    pending = None
+                    continue
+                # Just a code block inside the current file
+                for held in pending:
+                    add_line(held)
+                pending = None
+
+            if not match:
+                add_line(line)
+            elif match.group('fence'):
+                path = fence_path(match.group('info'))
+                if path:
+                    start_file(path)
+                    fence = match.group('fence')
+                else:
+                    pending = [line]
+                    pending_fence = match.group('fence')
+            else:
+                start_file(comment_header(match))
+
+    if pending is not None:
+        for held in pending:
+            add_line(held)
+
     # Save the last file
-    if current_file_path and current_content:
-        save_file(current_file_path, current_content, base_path)
-        files_created += 1
-    
+    start_file(None)
+
+    runstats.stats.count("lines", line_count)
+    runstats.stats.count("regex evaluations", regex_evaluations)
     print(f"Successfully created {files_created} files.")
     return True
 
@@ -71,17 +187,21 @@ def save_file(file_path, content, base_path):
         content.pop()
     
     try:
-        with open(full_path, 'w', encoding='utf-8') as f:
+        with runstats.stats.phase("write"), open(full_path, 'w', encoding='utf-8') as f:
             f.write('\n'.join(content))
             if content:  # Add final newline if file has content
                 f.write('\n')
+        if runstats.stats.enabled:
+            runstats.stats.count("files written")
+            runstats.stats.count("bytes written", os.path.getsize(full_path))
         print(f"Created: {full_path}")
     except Exception as e:
         print(f"Error writing file {full_path}: {e}")
 
 def main():
+    runstats.from_argv(sys.argv)
     if len(sys.argv) != 3:
-        print("Usage: python script.py <base_path> <input_file>")
+        print("Usage: python script.py <base_path> <input_file> [--stats] [--profile-out FILE]")
         print("Example: python script.py . file.txt")
         sys.exit(1)
     
@@ -0,0 +1,151 @@
+"""Shared filesystem helpers for the Python scripts in this folder.
+
+Everything is built on os.scandir so file/dir checks come from the
+directory entries instead of one stat call per path. Scripts import it
+directly (`import fswalk`), which works because Python puts the script's
+own folder on sys.path.
+
+    cache = fswalk.FsCache()
+    for root, dirs, files in fswalk.walk(top, prune=lambda e: e.name == ".git", cache=cache):
+        ...
+    cache.is_file(path)          # answered from the walk, no extra stat
+    cache.makedirs(out_dir)      # only hits the filesystem once per dir
+"""
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+import runstats
+
+
+def scandir(path):
+    """List the DirEntry objects of path (uncached)."""
+    runstats.stats.count("dir reads")
+    with os.scandir(path) as it:
+        return list(it)
+
+
+class FsCache:
+    """Memoizes directory listings, file types and created directories.
+
+    Results are only as fresh as the first lookup, so keep one cache per
+    run (or call clear()) when the tree is changing underneath.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._kinds = {}
+        self._made = set()
+
+    def clear(self):
+        self._entries.clear()
+        self._kinds.clear()
+        self._made.clear()
+
+    def entries(self, path):
+        """Cached DirEntry list of path; also records the type of every child."""
+        entries = self._entries.get(path)
+        if entries is None:
+            entries = self._entries[path] = scandir(path)
+            for e in entries:
+                if e.is_dir():
+                    kind = "d"
+                elif e.is_file():
+                    kind = "f"
+                elif e.is_symlink() and not os.path.exists(e.path):
+                    # Dangling link: doesn't exist, as with os.path.exists
+                    kind = ""
+                else:
+                    kind = "o"
+                self._kinds[e.path] = kind
+            self._kinds[path] = "d"
+        return entries
+
+    def _kind(self, path):
+        kind = self._kinds.get(path)
+        if kind is None:
+            runstats.stats.count("stat calls")
+            try:
+                st = os.stat(path)
+            except OSError:
+                kind = ""
+            else:
+                kind = "d" if stat.S_ISDIR(st.st_mode) else (
+                    "f" if stat.S_ISREG(st.st_mode) else "o"
+                )
+            self._kinds[path] = kind
+        return kind
+
+    def exists(self, path):
+        return self._kind(path) != ""
+
+    def is_file(self, path):
+        return self._kind(path) == "f"
+
+    def is_dir(self, path):
+        return self._kind(path) == "d"
+
+    def makedirs(self, path):
+        """os.makedirs(path, exist_ok=True), skipped for directories seen before."""
+        if path and path not in self._made:
+            os.makedirs(path, exist_ok=True)
+            self._made.add(path)
+            self._kinds[path] = "d"
+
+
+def walk(top, prune=None, workers=0, cache=None):
+    """Yield (root, dirs, files) like os.walk, with names taken from scandir.
+
+    prune(entry) returning True drops that file or directory (and everything
+    below it). As with os.walk, symlinks to directories are listed in dirs
+    but not descended into, and unreadable directories are skipped. With
+    workers > 1 every directory of a level is read in a thread pool; results
+    then come out level by level rather than depth first.
+    """
+    listdir = cache.entries if cache is not None else scandir
+
+    def read(path):
+        try:
+            entries = listdir(path)
+        except OSError:
+            return path, None
+        dirs = []
+        files = []
+        links = set()
+        for e in entries:
+            if prune is not None and prune(e):
+                continue
+            if e.is_dir():
+                dirs.append(e.name)
+                if e.is_symlink():
+                    links.add(e.name)
+            else:
+                files.append(e.name)
+        return path, (dirs, files, links)
+
+    def subdirs(root, dirs, links):
+        return [os.path.join(root, d) for d in dirs if d not in links]
+
+    if workers and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            level = [top]
+            while level:
+                next_level = []
+                for root, result in pool.map(read, level):
+                    if result is None:
+                        continue
+                    dirs, files, links = result
+                    yield root, dirs, files
+                    next_level.extend(subdirs(root, dirs, links))
+                level = next_level
+        return
+
+    stack = [top]
+    while stack:
+        root, result = read(stack.pop())
+        if result is None:
+            continue
+        dirs, files, links = result
+        yield root, dirs, files
+        # Callers may prune dirs in place, as with os.walk
+        stack.extend(reversed(subdirs(root, dirs, links)))
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 
+import heapq
 import json
+import os
 import sys
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Union, Dict
+from typing import Any, Iterator, List, Union, Dict
+
+import runstats
 
 def read_json_file(file_path: Path) -> Union[Dict, List]:
     """
@@ -16,8 +21,12 @@ def read_json_file(file_path: Path) -> Union[Dict, List]:
         Parsed JSON content as either a dict or list
     """
     try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        with runstats.stats.phase("parse"), open(file_path, 'r') as f:
+            data = json.load(f)
+        if runstats.stats.enabled:
+            runstats.stats.count("files read")
+            runstats.stats.count("bytes read", file_path.stat().st_size)
+        return data
     except json.JSONDecodeError as e:
         print(f"Error parsing {file_path}: {e}")
         sys.exit(1)
@@ -50,11 +59,209 @@ def merge_json_files(file_paths: List[Path]) -> List:
             print(f"Warning: Unexpected data type in {file_path}")
             continue
             
+    runstats.stats.count("records", len(merged_data))
     return merged_data
 
+def iter_json_records(file_path: Path, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Stream the records of a JSON file without loading it whole.
+    
+    Handles a top-level array (yields its elements), a single object, or
+    NDJSON / concatenated JSON values (yields each value). Array elements
+    must be separated by ',' and nothing but whitespace may follow the ']'.
+    
+    Args:
+        file_path: Path to the JSON file
+        chunk_size: Number of characters read at a time
+        
+    Yields:
+        One record at a time
+        
+    Raises:
+        ValueError: If the file is not valid JSON of one of these shapes
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r') as f:
+        buf = ''
+        pos = 0
+        eof = False
+        # Characters dropped from the front of buf, for error positions
+        offset = 0
+        
+        def read_more(size):
+            """Append up to size characters, dropping what was consumed."""
+            nonlocal buf, pos, eof, offset
+            data = f.read(size)
+            eof = not data
+            offset += pos
+            buf, pos = buf[pos:] + data, 0
+        
+        def next_char():
+            """Skip whitespace; return the next character, or '' at end of file."""
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return buf[pos:pos + 1]
+                read_more(chunk_size)
+        
+        def decode():
+            nonlocal buf, pos, offset
+            while True:
+                try:
+                    record, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as e:
+                    # Only an error at the very end of the buffer (or inside a
+                    # string running into it) can be a record cut off there
+                    cut_off = e.pos >= len(buf) - 16 or e.msg.startswith('Unterminated string')
+                    if eof or not cut_off:
+                        raise ValueError(f"{file_path}: {e.msg} at character {offset + e.pos}") from None
+                else:
+                    # A bare number at the end of the buffer ("12" of "123", "1." of
+                    # "1.5") only counts once a delimiter shows it is complete
+                    if (eof or isinstance(record, (dict, list, str))
+                            or (end < len(buf) and buf[end] in ' \t\r\n,]')):
+                        pos = end
+                        if pos > chunk_size:
+                            offset += pos
+                            buf, pos = buf[pos:], 0
+                        return record
+                # At least double the pending text, so a record spanning many
+                # chunks is re-parsed a logarithmic number of times
+                read_more(max(chunk_size, len(buf) - pos))
+        
+        if next_char() != '[':
+            while next_char():
+                yield decode()
+            return
+        
+        pos += 1
+        if next_char() == ']':
+            pos += 1
+        else:
+            index = 0
+            while True:
+                if not next_char():
+                    raise ValueError(f"{file_path}: unexpected end of file inside array")
+                yield decode()
+                c = next_char()
+                if c == ']':
+                    pos += 1
+                    break
+                if c != ',':
+                    raise ValueError(
+                        f"{file_path}: expected ',' or ']' after record {index}"
+                        + (f", found {c!r}" if c else ", found end of file")
+                    )
+                pos += 1
+                index += 1
+        if next_char():
+            raise ValueError(f"{file_path}: unexpected data after the closing ']'")
+
+def sort_key_getter(key: str):
+    """Build a key function for a (dotted) key such as 'timestamp' or 'meta.id'."""
+    parts = key.split('.')
+    
+    def get(record):
+        value = record
+        for part in parts:
+            value = value[part]
+        return value
+    return get
+
+class SortKey:
+    """Sort key that remembers where its record came from, so keys that can't
+    be compared (1 vs "1", null) fail with a ValueError naming both records."""
+    __slots__ = ('value', 'file_path', 'index')
+    
+    def __init__(self, value, file_path: Path, index: int):
+        self.value = value
+        self.file_path = file_path
+        self.index = index
+    
+    def __eq__(self, other):
+        return self.value == other.value
+    
+    def __lt__(self, other):
+        try:
+            return self.value < other.value
+        except TypeError:
+            raise ValueError(
+                f"{self.file_path}: record {self.index} has sort key {self.value!r}, "
+                f"which can't be compared with {other.value!r} "
+                f"({other.file_path}: record {other.index})"
+            ) from None
+
+def checked_sorted(records: Iterator[Any], file_path: Path, get_key) -> Iterator[Any]:
+    """Yield (SortKey, record) pairs, failing if records are not in ascending key order."""
+    previous = None
+    for i, record in enumerate(records):
+        try:
+            current = SortKey(get_key(record), file_path, i)
+        except (KeyError, TypeError, IndexError):
+            raise ValueError(f"{file_path}: record {i} has no sort key")
+        if i and current < previous:
+            raise ValueError(
+                f"{file_path}: record {i} is out of order ({current.value!r} < {previous.value!r})"
+            )
+        previous = current
+        yield current, record
+
+def merge_sorted_files(file_paths: List[Path], output_file: Path, key: str) -> int:
+    """
+    K-way merge inputs that are each sorted by key into one sorted JSON array.
+    
+    Inputs are streamed and merged through a heap, so only one pending record
+    per input is held in memory. Output goes to a temporary file next to
+    output_file that only replaces it once the merge has succeeded.
+    
+    Args:
+        file_paths: List of paths to JSON files, each sorted by key
+        output_file: Path of the merged output
+        key: Record field (dotted for nested fields) the inputs are sorted by
+        
+    Returns:
+        Number of records written
+    """
+    get_key = sort_key_getter(key)
+    streams = [checked_sorted(iter_json_records(p), p, get_key) for p in file_paths]
+    tmp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
+    count = 0
+    try:
+        with open(tmp_file, 'w') as f:
+            f.write('[')
+            for _, record in heapq.merge(*streams, key=itemgetter(0)):
+                # Same layout json.dump(..., indent=2) gives the whole list
+                f.write(',\n  ' if count else '\n  ')
+                f.write(json.dumps(record, indent=2).replace('\n', '\n  '))
+                count += 1
+            f.write('\n]' if count else ']')
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        # Leave any existing output_file untouched
+        tmp_file.unlink(missing_ok=True)
+        raise
+    return count
+
 def main():
+    runstats.from_argv(sys.argv)
+    
+    merge_key = None
+    if "--merge-sorted" in sys.argv:
+        idx = sys.argv.index("--merge-sorted")
+        if idx + 1 >= len(sys.argv):
+            print("Error: --merge-sorted needs a KEY")
+            sys.exit(1)
+        merge_key = sys.argv[idx + 1]
+        del sys.argv[idx:idx + 2]
+    
     if len(sys.argv) < 3:
-        print("Usage: ./merge_json.py output.json input1.json input2.json [input3.json ...]")
+        print("Usage: ./merge_json.py output.json input1.json input2.json [input3.json ...] [--stats] [--profile-out FILE]")
+        print("       ./merge_json.py --merge-sorted KEY output.json sorted1.json sorted2.json [...]")
+        print()
+        print("  --merge-sorted KEY  inputs are each sorted by KEY (JSON arrays or NDJSON);")
+        print("                      stream them into one output sorted by KEY")
         sys.exit(1)
     
     output_file = Path(sys.argv[1])
@@ -66,12 +273,23 @@ def main():
             print(f"Error: File {file_path} does not exist")
             sys.exit(1)
     
+    if merge_key:
+        try:
+            with runstats.stats.phase("merge"):
+                count = merge_sorted_files(input_files, output_file, merge_key)
+        except (ValueError, OSError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        runstats.stats.count("records", count)
+        print(f"Successfully merged {count} records from {len(input_files)} files into {output_file}")
+        return
+    
     # Merge the files
     merged_data = merge_json_files(input_files)
     
     # Write the merged data to the output file
     try:
-        with open(output_file, 'w') as f:
+        with runstats.stats.phase("write"), open(output_file, 'w') as f:
             json.dump(merged_data, f, indent=2)
         print(f"Successfully merged {len(input_files)} files into {output_file}")
     except Exception as e:
@@ -11,15 +11,31 @@ Expects folder structure:
           └── ...
 
 Season 00 is skipped (specials).
+
+With --watch the script stays resident and renames new downloads as they
+land: inotify is used when available (polling otherwise), files are left
+alone until their size stops changing, and only the affected series folder
+is reprocessed.
 """
 import sys
 import os
 import re
+import select
+import struct
+import time
+
+import fswalk
+import runstats
 
 MEDIA_EXTS = {".mkv", ".mp4", ".avi", ".ts", ".m4v", ".wmv", ".flv", ".webm"}
 SUB_EXTS = {".srt", ".vtt", ".ass", ".sub", ".idx", ".ssa"}
 ALL_EXTS = MEDIA_EXTS | SUB_EXTS
 
+# Seconds a file's size must stay unchanged before it is considered complete
+WATCH_SETTLE = 5.0
+# Rescan interval for the polling fallback
+POLL_INTERVAL = 10.0
+
 
 def split_ext(filename):
     """Split into (stem, ext), handling compound exts like .en.vtt"""
@@ -94,56 +110,224 @@ def format_name(series_name, season_num, start_ep, end_ep, ext):
     return f"{series_name} S{season_num:02d}{ep}{ext}"
 
 
-def process_season(series_name, season_path, season_num, apply):
-    files = sorted(
-        f
-        for f in os.listdir(season_path)
-        if os.path.isfile(os.path.join(season_path, f))
-        and is_media_or_sub(f)
-        and not f.startswith(".")
-    )
-    if not files:
+def list_media_files(folder):
+    """Names of media/subtitle files directly in folder (single directory read)."""
+    return [
+        e.name
+        for e in fswalk.scandir(folder)
+        if not e.name.startswith(".") and e.is_file() and is_media_or_sub(e.name)
+    ]
+
+
+def index_series(seasons):
+    """Group every media file of a series with its subtitles.
+
+    seasons is a list of (season_num, season_path). Files are first grouped by
+    stem, so `ep.mkv`, `ep.en.vtt`, `ep.idx` and `ep.sub` travel together;
+    subtitle-only stems are then attached to the media file with the same
+    episode in the same season. Subtitles that still have no media are kept
+    as orphan groups (group["media"] is empty).
+
+    Returns (groups, skipped, names): groups and skipped filenames keyed by
+    season_path, plus the set of all filenames per season_path.
+    """
+    by_stem = {}
+    skipped = {}
+    names = {}
+    for season_num, season_path in seasons:
+        with runstats.stats.phase("discover"):
+            files = list_media_files(season_path)
+        runstats.stats.count("files seen", len(files))
+        names[season_path] = set(files)
+        skipped[season_path] = []
+        for filename in sorted(files):
+            stem, ext = split_ext(filename)
+            group = by_stem.get((season_path, stem))
+            if group is None:
+                group = by_stem[(season_path, stem)] = {
+                    "season": season_num,
+                    "path": season_path,
+                    "stem": stem,
+                    "info": extract_episode_info(stem),
+                    "media": [],
+                    "subs": [],
+                }
+            kind = "media" if ext.lower() in MEDIA_EXTS else "subs"
+            group[kind].append((filename, ext))
+
+    by_episode = {}
+    for group in by_stem.values():
+        if group["media"] and group["info"] is not None:
+            by_episode.setdefault((group["path"], group["info"]), []).append(group)
+
+    # clean_stem + up to three patterns per distinct stem
+    runstats.stats.count("episode parses", len(by_stem))
+
+    groups = {season_path: [] for _, season_path in seasons}
+    for group in by_stem.values():
+        if not group["media"] and group["info"] is not None:
+            matches = by_episode.get((group["path"], group["info"]), [])
+            if len(matches) == 1:
+                matches[0]["subs"].extend(group["subs"])
+                continue
+        if group["info"] is None:
+            skipped[group["path"]].extend(f for f, _ in group["media"] + group["subs"])
+            continue
+        groups[group["path"]].append(group)
+    return groups, skipped, names
+
+
+def tagged_season(stem):
+    """Season number written into the filename as S##E##, or None."""
+    m = re.search(r"S(\d+)E\d+", clean_stem(stem), re.IGNORECASE)
+    return int(m.group(1)) if m else None
+
+
+def report_series_problems(groups):
+    """Print orphaned subtitles, files tagged with another season than their
+    folder, and episodes present in more than one season folder.
+
+    A file's season is the one in its S##E## tag if it has one, else its
+    folder's; duplicates within a single folder are left to the per-season
+    collision check.
+    """
+    by_episode = {}
+    for season_groups in groups.values():
+        for group in season_groups:
+            folder = os.path.basename(group["path"])
+            rel = os.path.join(folder, group["stem"])
+            if not group["media"]:
+                for filename, _ in group["subs"]:
+                    print(f"  [ORPHAN] {folder}/{filename}")
+                continue
+            season = tagged_season(group["stem"])
+            if season is None:
+                season = group["season"]
+            elif season != group["season"]:
+                print(f"  [WRONG SEASON] {rel} is tagged S{season:02d}")
+            start, end = group["info"]
+            by_episode.setdefault((season, start, end), []).append(group)
+
+    for (season_num, start, end), found in sorted(by_episode.items()):
+        if len({g["path"] for g in found}) > 1:
+            ep = format_name("", season_num, start, end, "").strip()
+            print(f"  [DUPLICATE] {ep} is in several seasons:")
+            for g in found:
+                print(f"      <- {os.path.join(os.path.basename(g['path']), g['stem'])}")
+
+
+def rename_batch(folder, renames):
+    """Rename (old, new) pairs inside folder, staging through temporary names
+    when a target is still occupied by a file that is itself being renamed.
+
+    If a rename fails, the ones already done are undone and the error is
+    re-raised; files that can't be restored are reported by name.
+    """
+    sources = {old for old, _ in renames}
+    if any(new in sources for _, new in renames):
+        staged = [(old, f".jellyfin-rename-{i}-{old}") for i, (old, _) in enumerate(renames)]
+        steps = staged + [(tmp, new) for (_, tmp), (_, new) in zip(staged, renames)]
+    else:
+        steps = list(renames)
+
+    done = []
+    try:
+        for src, dst in steps:
+            os.rename(os.path.join(folder, src), os.path.join(folder, dst))
+            done.append((src, dst))
+    except OSError:
+        for src, dst in reversed(done):
+            try:
+                os.rename(os.path.join(folder, dst), os.path.join(folder, src))
+            except OSError as e:
+                print(f"    [ERROR] could not restore {dst} -> {src}: {e}")
+        raise
+
+
+def process_season(series_name, season_path, season_num, groups, skipped, names, apply):
+    if not groups and not skipped:
         print("    (no media files)")
         return
 
-    renames = []
-    skipped = []
-    for filename in files:
-        stem, ext = split_ext(filename)
-        info = extract_episode_info(stem)
-        if info is None:
-            skipped.append(filename)
-            continue
-        start_ep, end_ep = info
-        new_name = format_name(series_name, season_num, start_ep, end_ep, ext)
-        if filename != new_name:
-            renames.append((filename, new_name))
+    # One batch per media file: the media and all of its subtitles
+    batches = []
+    for group in groups:
+        start_ep, end_ep = group["info"]
+        batch = []
+        for filename, ext in group["media"] + group["subs"]:
+            new_name = format_name(series_name, season_num, start_ep, end_ep, ext)
+            if filename != new_name:
+                batch.append((filename, new_name))
+        if batch:
+            batches.append(batch)
 
     for f in skipped:
         print(f"    [SKIP] {f}")
 
-    # Check for collisions
+    # Check for collisions, including files already sitting at a target name
+    renames = [r for batch in batches for r in batch]
+    sources = {old for old, _ in renames}
     targets = {}
     for old, new in renames:
         targets.setdefault(new, []).append(old)
     has_collision = False
-    for target, sources in targets.items():
-        if len(sources) > 1:
+    for target, srcs in targets.items():
+        occupied = target in names and target not in sources
+        if len(srcs) > 1 or occupied:
             has_collision = True
             print(f"    [COLLISION] {target}:")
-            for s in sources:
+            if occupied:
+                print(f"      <- (existing file)")
+            for s in srcs:
                 print(f"      <- {s}")
+    if has_collision:
+        runstats.stats.count("collisions")
     if has_collision and apply:
         print("    Aborting season due to collisions!")
         return
 
-    for old, new in renames:
-        if apply:
-            os.rename(os.path.join(season_path, old), os.path.join(season_path, new))
-            print(f"    {old} -> {new}")
-        else:
-            print(f"    {old}")
-            print(f"      -> {new}")
+    if apply:
+        try:
+            with runstats.stats.phase("rename"):
+                rename_batch(season_path, renames)
+        except OSError as e:
+            print(f"    [ERROR] {e}")
+            print("    Aborting season, renames rolled back.")
+            return
+        runstats.stats.count("files renamed", len(renames))
+    for batch in batches:
+        for old, new in batch:
+            if apply:
+                print(f"    {old} -> {new}")
+            else:
+                print(f"    {old}")
+                print(f"      -> {new}")
+
+
+def process_seasons(series_name, seasons, apply):
+    """Index all seasons of a series together, then rename season by season.
+
+    seasons is a list of (season_num, season_path, label). Season 00 is skipped.
+    """
+    indexed = [(num, path) for num, path, _ in seasons if num != 0]
+    with runstats.stats.phase("index"):
+        groups, skipped, names = index_series(indexed)
+    report_series_problems(groups)
+
+    for season_num, season_path, label in seasons:
+        if season_num == 0:
+            print(f"  {label}: (skipped)")
+            continue
+        print(f"  {label}:")
+        process_season(
+            series_name,
+            season_path,
+            season_num,
+            groups[season_path],
+            skipped[season_path],
+            names[season_path],
+            apply,
+        )
 
 
 def process_series(series_path, name_override=None, apply=False):
@@ -151,22 +335,20 @@ def process_series(series_path, name_override=None, apply=False):
     series_name = name_override or clean_series_name(folder_name)
 
     # Find Season folders
+    entries = sorted(fswalk.scandir(series_path), key=lambda e: e.name)
     season_dirs = []
-    for d in sorted(os.listdir(series_path)):
-        full = os.path.join(series_path, d)
-        if os.path.isdir(full):
-            m = re.match(r"Season\s+(\d+)", d, re.IGNORECASE)
+    for e in entries:
+        if e.is_dir():
+            m = re.match(r"Season\s+(\d+)", e.name, re.IGNORECASE)
             if m:
-                season_dirs.append((int(m.group(1)), full, d))
+                season_dirs.append((int(m.group(1)), e.path, e.name))
 
     # No Season folders: create Season 01 and move media files into it
     if not season_dirs:
         loose_files = [
-            f
-            for f in os.listdir(series_path)
-            if os.path.isfile(os.path.join(series_path, f))
-            and is_media_or_sub(f)
-            and not f.startswith(".")
+            e.name
+            for e in entries
+            if e.is_file() and is_media_or_sub(e.name) and not e.name.startswith(".")
         ]
         if not loose_files:
             return
@@ -190,8 +372,9 @@ def process_series(series_path, name_override=None, apply=False):
             season_dirs = [(1, season_dir, "Season 01")]
         else:
             # Dry-run: simulate rename from the original location
-            print(f"  Season 01 (rename preview):")
-            process_season(series_name, series_path, 1, apply=False)
+            process_seasons(
+                series_name, [(1, series_path, "Season 01 (rename preview)")], False
+            )
             return
 
     else:
@@ -199,25 +382,255 @@ def process_series(series_path, name_override=None, apply=False):
         if series_name != folder_name:
             print(f"  -> {series_name}")
 
-    for season_num, season_path, season_name in season_dirs:
-        if season_num == 0:
-            print(f"  {season_name}: (skipped)")
-            continue
-        print(f"  {season_name}:")
-        process_season(series_name, season_path, season_num, apply)
+    process_seasons(series_name, season_dirs, apply)
+
+
+def is_series_folder(folder):
+    """A series folder either has Season subdirs or has media files directly in it."""
+    for entry in fswalk.scandir(folder):
+        if entry.is_dir() and re.match(r"Season\s+\d+", entry.name, re.IGNORECASE):
+            return True
+        if entry.is_file() and is_media_or_sub(entry.name):
+            return True
+    return False
+
+
+def is_hidden(entry):
+    return entry.name.startswith(".")
+
+
+def iter_media_files(folder):
+    """Yield paths of all media/subtitle files below folder."""
+    for root, _, files in fswalk.walk(folder, prune=is_hidden):
+        for f in files:
+            if is_media_or_sub(f):
+                yield os.path.join(root, f)
+
+
+class InotifyWatcher:
+    """Recursive inotify watch via ctypes. Raises OSError if unavailable."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, root):
+        import ctypes
+        import ctypes.util
+
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify not supported")
+        self.fd = self._libc.inotify_init1(self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self.wds = {}
+        self._add_tree(root)
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            err = self._ctypes.get_errno()
+            print(f"Warning: cannot watch {path}: {os.strerror(err)}")
+            return
+        self.wds[wd] = path
+
+    def _add_tree(self, top):
+        for root, _, _ in fswalk.walk(top, prune=is_hidden):
+            self._add_watch(root)
+
+    def close(self):
+        os.close(self.fd)
+
+    def wait(self, timeout):
+        """Block up to timeout seconds (forever if None); return changed file paths."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        data = os.read(self.fd, 64 * 1024)
+        changed = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were dropped: treat everything as changed
+                changed.extend(iter_media_files(self.root))
+                continue
+            if mask & self.IN_IGNORED:
+                self.wds.pop(wd, None)
+                continue
+            parent = self.wds.get(wd)
+            if parent is None or not name or name.startswith("."):
+                continue
+            path = os.path.join(parent, name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # Files inside a moved-in tree produce no events of their own
+                    self._add_tree(path)
+                    changed.extend(iter_media_files(path))
+            elif is_media_or_sub(name):
+                changed.append(path)
+        return changed
+
+
+class PollingWatcher:
+    """Fallback watcher that diffs (size, mtime) snapshots of the tree."""
+
+    def __init__(self, root, interval=POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for path in iter_media_files(self.root):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def close(self):
+        pass
+
+    def wait(self, timeout):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = [p for p, sig in snapshot.items() if self.snapshot.get(p) != sig]
+        self.snapshot = snapshot
+        return changed
+
+
+def watch(folder, name_override=None, apply=False, force_poll=False):
+    """Reprocess series folders as files below folder finish downloading."""
+    single_series = is_series_folder(folder)
+
+    def series_for(path):
+        if single_series:
+            return folder
+        parts = os.path.relpath(path, folder).split(os.sep)
+        if len(parts) < 2 or parts[0] == os.pardir:
+            return None
+        return os.path.join(folder, parts[0])
+
+    def already_renamed(path, series_path):
+        """True for files our own renames produce, so they don't retrigger a pass."""
+        season_path, filename = os.path.split(path)
+        m = re.match(r"Season\s+(\d+)$", os.path.basename(season_path), re.IGNORECASE)
+        if not m or os.path.dirname(season_path) != series_path:
+            return False
+        stem, ext = split_ext(filename)
+        info = extract_episode_info(stem)
+        if info is None:
+            return False
+        series_name = (single_series and name_override) or clean_series_name(
+            os.path.basename(series_path)
+        )
+        return filename == format_name(series_name, int(m.group(1)), *info, ext)
+
+    watcher = None
+    if not force_poll:
+        try:
+            watcher = InotifyWatcher(folder)
+            print(f"Watching {folder} (inotify)")
+        except OSError as e:
+            print(f"inotify unavailable ({e}), falling back to polling")
+    if watcher is None:
+        watcher = PollingWatcher(folder)
+        print(f"Watching {folder} (polling every {watcher.interval:g}s)")
+
+    # path -> (last seen size, monotonic time of next size check)
+    pending = {}
+    try:
+        while True:
+            timeout = None
+            if pending:
+                next_check = min(deadline for _, deadline in pending.values())
+                timeout = max(0.0, next_check - time.monotonic())
+
+            for path in watcher.wait(timeout):
+                series_path = series_for(path)
+                if series_path is None or already_renamed(path, series_path):
+                    continue
+                # Record the size now so one quiet interval is enough to settle
+                try:
+                    size = os.stat(path).st_size
+                except OSError:
+                    pending.pop(path, None)
+                    continue
+                pending[path] = (size, time.monotonic() + WATCH_SETTLE)
+
+            now = time.monotonic()
+            settled = set()
+            for path, (size, deadline) in list(pending.items()):
+                if deadline > now:
+                    continue
+                try:
+                    current = os.stat(path).st_size
+                except OSError:
+                    # Renamed or deleted before it settled
+                    del pending[path]
+                    continue
+                if current != size:
+                    pending[path] = (current, now + WATCH_SETTLE)
+                else:
+                    del pending[path]
+                    settled.add(series_for(path))
+
+            # Only touch a series once none of its files are still being written
+            busy = {series_for(p) for p in pending}
+            for series_path in sorted(settled - busy):
+                if not os.path.isdir(series_path):
+                    continue
+                # A download moved away mid-pass must not stop the watcher
+                try:
+                    process_series(
+                        series_path, name_override if single_series else None, apply
+                    )
+                except OSError as e:
+                    print(f"  [ERROR] {os.path.basename(series_path)}: {e}")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        watcher.close()
 
 
 def main():
+    runstats.from_argv(sys.argv)
     if len(sys.argv) < 2:
-        print(f"Usage: {sys.argv[0]} <folder> [--name NAME] [--apply]")
+        print(f"Usage: {sys.argv[0]} <folder> [--name NAME] [--apply] [--watch [--poll]]")
         print()
-        print("  folder   series folder or root folder containing series")
-        print("  --name   override series name (single series only)")
-        print("  --apply  rename files (default: dry-run)")
+        print("  folder              series folder or root folder containing series")
+        print("  --name              override series name (single series only)")
+        print("  --apply             rename files (default: dry-run)")
+        print("  --watch             keep running and rename new files once fully written")
+        print("  --poll              with --watch, poll instead of using inotify")
+        print("  --stats             print timings and counters on exit")
+        print("  --profile-out FILE  write a cProfile dump (Chrome trace if FILE is .json)")
         sys.exit(1)
 
     folder = os.path.abspath(sys.argv[1])
     apply = "--apply" in sys.argv
+    watch_mode = "--watch" in sys.argv
 
     name_override = None
     if "--name" in sys.argv:
@@ -233,27 +646,18 @@ def main():
         print("DRY RUN (pass --apply to rename)\n")
 
     # Detect: series folder vs root folder containing series
-    # A series folder either has Season subdirs or has media files directly in it
-    has_seasons = any(
-        re.match(r"Season\s+\d+", d, re.IGNORECASE)
-        for d in os.listdir(folder)
-        if os.path.isdir(os.path.join(folder, d))
-    )
-    has_media = any(
-        is_media_or_sub(f)
-        for f in os.listdir(folder)
-        if os.path.isfile(os.path.join(folder, f))
-    )
-
-    if has_seasons or has_media:
+    if is_series_folder(folder):
         process_series(folder, name_override, apply)
     else:
         if name_override:
             print("Warning: --name ignored when processing multiple series\n")
-        for d in sorted(os.listdir(folder)):
-            series_path = os.path.join(folder, d)
-            if os.path.isdir(series_path):
-                process_series(series_path, apply=apply)
+        for e in sorted(fswalk.scandir(folder), key=lambda e: e.name):
+            if e.is_dir():
+                process_series(e.path, apply=apply)
+
+    if watch_mode:
+        print()
+        watch(folder, name_override, apply, force_poll="--poll" in sys.argv)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,14 @@
 #!/usr/bin/env python3
 import sys
 import os
-from itertools import groupby
+import re
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import fswalk
+import runstats
+
+_DIGITS = re.compile(r"(\d+)")
 
 
 def stem_and_ext(filename):
@@ -12,53 +19,290 @@ def stem_and_ext(filename):
     return filename[:dot], filename[dot:]
 
 
-def main():
-    if len(sys.argv) < 4:
-        print(f"Usage: {sys.argv[0]} <folder> <base_name> <start_number> [--apply]")
-        sys.exit(1)
+def natural_key(name):
+    """Sort key that orders embedded numbers numerically: ep2 < ep10"""
+    parts = _DIGITS.split(name)
+    # Text parts land on even indices and digit runs on odd ones, so the
+    # resulting tuples always compare str with str and int with int
+    parts[1::2] = [int(p) for p in parts[1::2]]
+    parts[0::2] = [p.lower() for p in parts[0::2]]
+    return parts, name
+
+
+def list_files(folder, exclude=()):
+    """Return (files, names) from a single directory read: the regular,
+    non-hidden files to number, and the name of every entry in folder."""
+    entries = fswalk.scandir(folder)
+    files = [
+        e.name
+        for e in entries
+        if e.is_file() and not e.name.startswith(".") and e.name not in exclude
+    ]
+    return files, {e.name for e in entries}
+
+
+def group_by_stem(files):
+    """Group files sharing a stem, ordered naturally by stem then filename.
+
+    Grouping goes through a stem -> files dict, so files with the same stem
+    end up together no matter where they would sort.
+    """
+    index = {}
+    for filename in files:
+        index.setdefault(stem_and_ext(filename)[0], []).append(filename)
+    return [
+        sorted(index[stem], key=natural_key) for stem in sorted(index, key=natural_key)
+    ]
+
+
+def plan_renames(groups, base_name, start):
+    """Return the (old, new) renames numbering groups from start."""
+    total = start + len(groups) - 1
+    width = max(2, len(str(total)))
+    renames = []
+    for num, group in enumerate(groups, start):
+        for filename in group:
+            _, ext = stem_and_ext(filename)
+            renames.append((filename, f"{base_name} - {num:0{width}d}{ext}"))
+    return renames
+
+
+def find_collisions(renames, existing):
+    """Map each target reached by more than one file, or already occupied by an
+    entry (file, directory, ...) that is not being renamed away, to its sources."""
+    sources = {old for old, new in renames if old != new}
+    targets = {}
+    for old, new in renames:
+        targets.setdefault(new, []).append(old)
+    return {
+        target: olds
+        for target, olds in targets.items()
+        if len(olds) > 1 or (target in existing and target not in sources and olds != [target])
+    }
+
+
+def apply_renames(folder, renames):
+    """Rename in batch. If any target is still held by another source (a chain
+    or cycle such as a -> b -> a) everything goes through temporary names first.
+
+    If a rename fails, the ones already done are undone and the error is
+    re-raised; files that can't be restored are reported by name.
+    """
+    moves = [(old, new) for old, new in renames if old != new]
+    sources = {old for old, _ in moves}
+    if any(new in sources for _, new in moves):
+        # Temporary names keep the original, so nothing is lost if a restore fails
+        staged = [(old, f".rename-sequence-{i}-{old}") for i, (old, _) in enumerate(moves)]
+        steps = staged + [(tmp, new) for (_, tmp), (_, new) in zip(staged, moves)]
+    else:
+        steps = moves
+
+    done = []
+    try:
+        for src, dst in steps:
+            os.rename(os.path.join(folder, src), os.path.join(folder, dst))
+            done.append((src, dst))
+    except OSError:
+        for src, dst in reversed(done):
+            try:
+                os.rename(os.path.join(folder, dst), os.path.join(folder, src))
+            except OSError as e:
+                print(f"  [ERROR] could not restore {dst} -> {src}: {e}")
+        raise
+    runstats.stats.count("files renamed", len(moves))
+
+
+def plan_folder(folder, base_name, start, exclude=()):
+    """Scan one folder and work out its renames without touching anything."""
+    plan = {"folder": folder, "files": [], "groups": [], "renames": [], "collisions": {}}
+    try:
+        with runstats.stats.phase("discover"):
+            files, names = list_files(folder, exclude)
+    except OSError as e:
+        plan["error"] = str(e)
+        return plan
+    runstats.stats.count("files seen", len(files))
+    with runstats.stats.phase("match"):
+        groups = group_by_stem(files)
+        renames = plan_renames(groups, base_name, start)
+        collisions = find_collisions(renames, names)
+    plan.update(files=files, groups=groups, renames=renames, collisions=collisions)
+    return plan
+
 
-    folder = sys.argv[1]
-    base_name = sys.argv[2]
-    start = int(sys.argv[3])
+def load_manifest(path):
+    """Read a JSON manifest: {"folder": {"base_name": "Name", "start": 1}, ...}
+
+    base_name defaults to the folder name and start to 1. Relative folders
+    are resolved against the manifest's directory. Raises ValueError for a
+    manifest that doesn't have this shape.
+    """
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict):
+        raise ValueError(f"{path}: expected an object mapping folder -> options")
+    root = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for folder, opts in manifest.items():
+        if not isinstance(opts, dict):
+            raise ValueError(f"{path}: options for '{folder}' must be an object")
+        base_name = opts.get("base_name")
+        if base_name is not None and not isinstance(base_name, str):
+            raise ValueError(f"{path}: base_name for '{folder}' must be a string")
+        start = opts.get("start", 1)
+        if isinstance(start, bool) or not isinstance(start, int):
+            raise ValueError(f"{path}: start for '{folder}' must be an integer")
+        folder = os.path.join(root, folder)
+        jobs.append((folder, base_name or os.path.basename(folder), start))
+    return jobs
+
+
+def run_batch(jobs, apply, workers=None, exclude=()):
+    """Plan every (folder, base_name, start) job in a thread pool, then apply
+    the clean ones in order with a single progress report. A folder listed
+    more than once is only processed the first time."""
+    unique = {}
+    for folder, base_name, start in jobs:
+        folder = os.path.abspath(folder)
+        if folder in unique:
+            print(f"Skipping {folder}: listed more than once")
+            continue
+        unique[folder] = (folder, base_name, start)
+    jobs = list(unique.values())
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        plans = list(pool.map(lambda job: plan_folder(*job, exclude=exclude), jobs))
+
+    if not apply:
+        print("Dry run (pass --apply to rename):")
+
+    failed = 0
+    renamed = 0
+    total_files = 0
+    for i, plan in enumerate(plans, 1):
+        folder = plan["folder"]
+        # Dry runs list every rename, so keep folders visually apart
+        progress = f"{'' if apply else chr(10)}[{i}/{len(plans)}] {folder}"
+        if "error" in plan:
+            failed += 1
+            print(f"{progress}: error: {plan['error']}")
+            continue
+        if plan["collisions"]:
+            failed += 1
+            print(f"{progress}: skipped due to collisions")
+            for target, sources in plan["collisions"].items():
+                print(f"  [COLLISION] {target}:")
+                for s in sources:
+                    print(f"    <- {s}")
+            continue
+
+        moves = [(old, new) for old, new in plan["renames"] if old != new]
+        total_files += len(plan["files"])
+        if apply:
+            try:
+                with runstats.stats.phase("rename"):
+                    apply_renames(folder, moves)
+            except OSError as e:
+                failed += 1
+                print(f"{progress}: error: {e}; renames rolled back")
+                continue
+            renamed += len(moves)
+            print(f"{progress}: {len(moves)} renamed")
+        else:
+            print(f"{progress}: {len(plan['groups'])} episodes")
+            for old, new in moves:
+                print(f"  {old} -> {new}")
+
+    print()
+    if apply:
+        print(f"{renamed} files renamed in {len(plans) - failed} folders, {failed} failed.")
+    else:
+        print(f"{len(plans)} folders, {total_files} files total, {failed} with problems.")
+    return failed == 0
+
+
+def usage():
+    print(f"Usage: {sys.argv[0]} <folder> <base_name> <start_number> [--apply]")
+    print(f"       {sys.argv[0]} --batch <start_number> <folder>... [--apply]")
+    print(f"       {sys.argv[0]} --manifest <manifest.json> [--apply]")
+    print()
+    print("  --batch             rename many folders, using each folder's name as base_name")
+    print("  --manifest          JSON mapping folder -> {\"base_name\": ..., \"start\": ...}")
+    print("  --stats             print timings and counters on exit")
+    print("  --profile-out FILE  cProfile dump, or Chrome trace if FILE ends in .json")
+    sys.exit(1)
+
+
+def main():
+    runstats.from_argv(sys.argv)
     apply = "--apply" in sys.argv
+    args = [a for a in sys.argv[1:] if a != "--apply"]
+    script = os.path.basename(__file__)
+
+    if args[:1] == ["--manifest"]:
+        if len(args) != 2:
+            usage()
+        try:
+            jobs = load_manifest(args[1])
+        except (OSError, ValueError) as e:
+            print(f"Error: could not load manifest: {e}")
+            sys.exit(1)
+        ok = run_batch(jobs, apply, exclude={script})
+        sys.exit(0 if ok else 1)
+    if args[:1] == ["--batch"]:
+        if len(args) < 3:
+            usage()
+        start = int(args[1])
+        jobs = [(f, os.path.basename(os.path.abspath(f)), start) for f in args[2:]]
+        ok = run_batch(jobs, apply, exclude={script})
+        sys.exit(0 if ok else 1)
+
+    if len(args) < 3:
+        usage()
+
+    folder = args[0]
+    base_name = args[1]
+    start = int(args[2])
 
     folder = os.path.abspath(folder)
     if not os.path.isdir(folder):
         print(f"Error: '{folder}' is not a directory.")
         sys.exit(1)
 
-    script = os.path.basename(__file__)
-    files = sorted(
-        f for f in os.listdir(folder)
-        if os.path.isfile(os.path.join(folder, f)) and f != script and not f.startswith(".")
+    plan = plan_folder(folder, base_name, start, exclude={script})
+    files, groups, renames, collisions = (
+        plan["files"], plan["groups"], plan["renames"], plan["collisions"]
     )
 
     if not files:
         print("No files to rename.")
         return
 
-    # Group consecutive files that share the same stem
-    groups = [list(g) for _, g in groupby(files, key=lambda f: stem_and_ext(f)[0])]
-
-    total = start + len(groups) - 1
-    width = max(2, len(str(total)))
+    for target, sources in collisions.items():
+        print(f"[COLLISION] {target}:")
+        for s in sources:
+            print(f"  <- {s}")
+    if collisions and apply:
+        print("Aborting due to collisions!")
+        sys.exit(1)
 
     if not apply:
         print("Dry run (pass --apply to rename):\n")
+    else:
+        try:
+            with runstats.stats.phase("rename"):
+                apply_renames(folder, renames)
+        except OSError as e:
+            print(f"Error: {e}")
+            print("Aborting, renames rolled back.")
+            sys.exit(1)
 
-    num = start
-    for group in groups:
-        for filename in group:
-            _, ext = stem_and_ext(filename)
-            new_name = f"{base_name} - {num:0{width}d}{ext}"
-            if apply:
-                os.rename(os.path.join(folder, filename), os.path.join(folder, new_name))
-                print(f"  {filename} -> {new_name}")
-            else:
-                print(f"  {filename}")
-                print(f"    -> {new_name}")
-                print()
-        num += 1
+    for filename, new_name in renames:
+        if apply:
+            print(f"  {filename} -> {new_name}")
+        else:
+            print(f"  {filename}")
+            print(f"    -> {new_name}")
+            print()
 
     if not apply:
         print(f"{len(groups)} episodes, {len(files)} files total.")
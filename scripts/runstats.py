@@ -0,0 +1,149 @@
+"""Opt-in timing and counters for the Python scripts in this folder.
+
+Scripts call `runstats.from_argv(sys.argv)` before parsing their own
+arguments. It removes the shared options from argv:
+
+  --stats             print per-phase timings and counters on exit
+  --profile-out FILE  also write a cProfile dump to FILE, or a Chrome trace
+                      (chrome://tracing, Perfetto) if FILE ends in .json
+
+and then code reports through the module-level `runstats.stats`:
+
+    with runstats.stats.phase("copy"):
+        ...
+    runstats.stats.count("files copied")
+
+Without the options `stats` is a NullStats whose methods do nothing, so
+the instrumentation stays in place at no real cost. Counters on per-item
+hot paths should still be added up locally and reported once per batch.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_NULL_PHASE = nullcontext()
+
+
+class NullStats:
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def count(self, name, n=1):
+        pass
+
+
+class Stats:
+    enabled = True
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.counters = {}
+        self.events = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                calls, total = self.phases.get(name, (0, 0.0))
+                self.phases[name] = (calls + 1, total + end - begin)
+                self.events.append((name, begin, end, threading.get_ident()))
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self, out=sys.stderr):
+        total = time.perf_counter() - self.start
+        print(f"\n--- stats ({total:.3f}s total) ---", file=out)
+        if self.phases:
+            width = max(len(name) for name in self.phases)
+            for name, (calls, seconds) in self.phases.items():
+                print(f"  {name:<{width}}  {seconds:9.3f}s  x{calls}", file=out)
+        if self.counters:
+            width = max(len(name) for name in self.counters)
+            for name, value in self.counters.items():
+                print(f"  {name:<{width}}  {value:>10}", file=out)
+
+    def write_trace(self, path):
+        """Write phases as complete events and counters as one counter sample."""
+        pid = os.getpid()
+        to_us = lambda t: round((t - self.start) * 1e6, 1)
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": to_us(begin),
+                "dur": round((end - begin) * 1e6, 1),
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, begin, end, tid in self.events
+        ]
+        if self.counters:
+            events.append(
+                {
+                    "name": "counters",
+                    "ph": "C",
+                    "ts": to_us(time.perf_counter()),
+                    "pid": pid,
+                    "args": self.counters,
+                }
+            )
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events}, f)
+
+
+stats = NullStats()
+
+
+def from_argv(argv):
+    """Strip --stats/--profile-out FILE from argv (in place) and enable stats if given."""
+    global stats
+    enabled = False
+    profile_path = None
+    if "--stats" in argv:
+        argv.remove("--stats")
+        enabled = True
+    if "--profile-out" in argv:
+        idx = argv.index("--profile-out")
+        if idx + 1 >= len(argv):
+            print("Error: --profile-out needs an output file")
+            sys.exit(1)
+        profile_path = argv[idx + 1]
+        del argv[idx:idx + 2]
+        enabled = True
+    if not enabled:
+        return stats
+
+    stats = Stats()
+    profiler = None
+    if profile_path and not profile_path.endswith(".json"):
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    def finish():
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        elif profile_path:
+            stats.write_trace(profile_path)
+        stats.report()
+        if profile_path:
+            print(f"  profile written to {profile_path}", file=sys.stderr)
+
+    atexit.register(finish)
+    return stats
@@ -8,9 +8,15 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Optional
 
+import fswalk
+import runstats
+
 # Default config filename to look for in project folders
 CONFIG_FILENAME = "to_claude.json"
 
+# Directory listings and file types are looked up once per run
+_fs = fswalk.FsCache()
+
 
 class ProjectConfig:
     def __init__(self, config_path: Optional[str] = None):
@@ -121,7 +127,19 @@ class ProjectConfig:
 
 def should_exclude(path: str, exclude_patterns: List[str]) -> bool:
     """Check if path should be excluded based on patterns"""
-    return any(pattern in path for pattern in exclude_patterns)
+    if any(pattern in path for pattern in exclude_patterns):
+        runstats.stats.count("excluded")
+        return True
+    return False
+
+
+def copy_file(src_path: str, dst_path: str) -> None:
+    """Copy a single file, keeping metadata"""
+    shutil.copy2(src_path, dst_path)
+    print(f"Copied: {src_path} -> {dst_path}")
+    if runstats.stats.enabled:
+        runstats.stats.count("files copied")
+        runstats.stats.count("bytes copied", os.path.getsize(dst_path))
 
 
 def copy_files_recursive(
@@ -133,7 +151,7 @@ def copy_files_recursive(
 ) -> None:
     """Recursively copy files from source path to destination with prefix"""
     try:
-        if not os.path.exists(src_path):
+        if not _fs.exists(src_path):
             print(f"Warning: {src_path} does not exist")
             return
 
@@ -141,15 +159,14 @@ def copy_files_recursive(
             print(f"Excluded: {src_path}")
             return
 
-        if os.path.isfile(src_path):
+        if _fs.is_file(src_path):
             filename = os.path.basename(src_path)
             dst_path = os.path.join(destination_folder, f"{folder_prefix}_{filename}")
-            shutil.copy2(src_path, dst_path)
-            print(f"Copied: {src_path} -> {dst_path}")
+            copy_file(src_path, dst_path)
             return
 
-        for item in os.listdir(src_path):
-            item_path = os.path.join(src_path, item)
+        for entry in _fs.entries(src_path):
+            item_path = entry.path
             if should_exclude(item_path, exclude_patterns):
                 print(f"Excluded: {item_path}")
                 continue
@@ -157,10 +174,9 @@ def copy_files_recursive(
             rel_path = os.path.relpath(item_path, source_folder)
             new_prefix = rel_path.replace(os.sep, "_")
 
-            if os.path.isfile(item_path):
+            if entry.is_file():
                 dst_path = os.path.join(destination_folder, f"{new_prefix}")
-                shutil.copy2(item_path, dst_path)
-                print(f"Copied: {item_path} -> {dst_path}")
+                copy_file(item_path, dst_path)
             else:
                 copy_files_recursive(
                     item_path,
@@ -176,18 +192,25 @@ def copy_files_recursive(
         print(f"Error processing {src_path}: {str(e)}")
 
 
-def expand_glob_patterns(patterns: List[str], source_folder: str) -> List[str]:
-    """Expand glob patterns to actual file paths"""
+def expand_glob_patterns(
+    patterns: List[str], source_folder: str, workers: int = 0
+) -> List[str]:
+    """Expand glob patterns to actual file paths.
+
+    workers > 1 reads directories in a thread pool while expanding "/**".
+    """
     expanded_paths = []
     for pattern in patterns:
         # Handle the /** pattern specially
         if pattern.endswith("/**"):
             base_path = os.path.join(source_folder, pattern[:-3])
-            if os.path.exists(base_path):
+            if _fs.exists(base_path):
                 # Add the base directory
                 expanded_paths.append(base_path)
                 # Add all subdirectories and files
-                for root, dirs, files in os.walk(base_path):
+                for root, dirs, files in fswalk.walk(
+                    base_path, workers=workers, cache=_fs
+                ):
                     expanded_paths.extend([os.path.join(root, d) for d in dirs])
                     expanded_paths.extend([os.path.join(root, f) for f in files])
         else:
@@ -199,7 +222,7 @@ def expand_glob_patterns(patterns: List[str], source_folder: str) -> List[str]:
             else:
                 # If no matches, add the original path (might be a direct path)
                 potential_path = os.path.join(source_folder, pattern)
-                if os.path.exists(potential_path):
+                if _fs.exists(potential_path):
                     expanded_paths.append(potential_path)
 
     return expanded_paths
@@ -214,8 +237,11 @@ def find_config_file(source_folder: str) -> Optional[str]:
 
 
 def main():
+    runstats.from_argv(sys.argv)
     parser = argparse.ArgumentParser(
-        description="Copy project files to Claude directory"
+        description="Copy project files to Claude directory",
+        epilog="Add --stats for timings and counters, --profile-out FILE for a "
+        "cProfile dump (or Chrome trace if FILE ends in .json).",
     )
     parser.add_argument("source_folder", help="Source folder to copy from")
     parser.add_argument(
@@ -234,6 +260,13 @@ def main():
     parser.add_argument(
         "--list-profiles", action="store_true", help="List all available profiles"
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=0,
+        help="Threads used to scan directories (default: scan serially)",
+    )
     parser.add_argument(
         "--init-config",
         action="store_true",
@@ -299,7 +332,11 @@ def main():
             sys.exit(1)
 
         # Expand all glob patterns
-        expanded_paths = expand_glob_patterns(folders_to_copy, source_folder)
+        with runstats.stats.phase("discover"):
+            expanded_paths = expand_glob_patterns(
+                folders_to_copy, source_folder, args.jobs
+            )
+        runstats.stats.count("paths matched", len(expanded_paths))
 
         if not expanded_paths:
             print("No matching files found")
@@ -307,26 +344,26 @@ def main():
 
         # Create destination folder
         destination = os.path.abspath(args.destination)
-        os.makedirs(destination, exist_ok=True)
+        _fs.makedirs(destination)
         print(f"Copying to: {destination}")
 
         # Copy files
-        for path in expanded_paths:
-            if should_exclude(path, exclude_patterns):
-                print(f"Excluded: {path}")
-                continue
-
-            rel_path = os.path.relpath(path, source_folder)
-            folder_prefix = rel_path.replace(os.sep, "_")
-
-            if os.path.isfile(path):
-                dst_path = os.path.join(destination, folder_prefix)
-                shutil.copy2(path, dst_path)
-                print(f"Copied: {path} -> {dst_path}")
-            else:
-                copy_files_recursive(
-                    path, destination, folder_prefix, exclude_patterns, source_folder
-                )
+        with runstats.stats.phase("copy"):
+            for path in expanded_paths:
+                if should_exclude(path, exclude_patterns):
+                    print(f"Excluded: {path}")
+                    continue
+
+                rel_path = os.path.relpath(path, source_folder)
+                folder_prefix = rel_path.replace(os.sep, "_")
+
+                if _fs.is_file(path):
+                    dst_path = os.path.join(destination, folder_prefix)
+                    copy_file(path, dst_path)
+                else:
+                    copy_files_recursive(
+                        path, destination, folder_prefix, exclude_patterns, source_folder
+                    )
 
         print(f"\nCopy completed! Files copied to: {destination}")
 